@@ -1,7 +1,15 @@
-from flask import Flask, render_template, request, jsonify
+import hashlib
+import threading
+import pandas as pd
+from flask import Flask, render_template, request, jsonify, make_response
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 
+try:
+    from apscheduler.schedulers.background import BackgroundScheduler
+except ImportError:
+    BackgroundScheduler = None  # optional; refresh falls back to the request path
+
 from etf_base import build_etf_table, show_top10_table, compute_etf_value
 from openai_base import ask_about_etf_table
 
@@ -10,44 +18,100 @@ load_dotenv()
 app = Flask(__name__)
 
 IMF_CSV = 'data/imf_dataset.csv'
-etf_table, wide_df = build_etf_table(IMF_CSV)
-summary_df = show_top10_table(etf_table, wide_df)
-etf_value = compute_etf_value(etf_table, wide_df)
-summary_html = summary_df.to_html(classes='table table-striped', index=False)
+
+# last-published ETF data; rebuilt off the request thread and swapped in
+# under the lock so handlers never block on a rebuild
+_data_lock = threading.Lock()
+etf_table = None
+wide_df = None
+summary_df = None
+etf_value = None
+summary_html = None
+summary_text = None
+summary_etag = None
 last_build = None
 
 def refresh_data():
-    """Rebuild global ETF data and update timestamp."""
-    global etf_table, wide_df, summary_df, etf_value, last_build
+    """Rebuild the ETF data and publish it atomically under the lock."""
+    global etf_table, wide_df, summary_df, etf_value, summary_html, summary_text, summary_etag, last_build
+
+    table, wide = build_etf_table(IMF_CSV)
+    summary = show_top10_table(table, wide)
+    value = compute_etf_value(table, wide)
 
-    etf_table, _wide_df = build_etf_table(IMF_CSV)
-    summary_df          = show_top10_table(etf_table, wide_df)
-    etf_value           = compute_etf_value(etf_table, wide_df)
-    last_build          = datetime.now()
+    # content hash of the summary doubles as the HTTP ETag; when it matches
+    # the previous build the HTML/markdown renders are reused as-is
+    tag = hashlib.blake2b(
+        pd.util.hash_pandas_object(summary).values.tobytes(), digest_size=16
+    ).hexdigest()
+
+    with _data_lock:
+        if tag == summary_etag:
+            html, text = summary_html, summary_text
+        else:
+            html = summary.to_html(classes='table table-striped', index=False)
+            text = summary.to_string(index=False)
+        etf_table, wide_df = table, wide
+        summary_df = summary
+        etf_value = value
+        summary_html = html
+        summary_text = text
+        summary_etag = tag
+        last_build = datetime.now()
     app.logger.info(f"ETF data refreshed at {last_build.isoformat()}")
 
-refresh_data()
+if BackgroundScheduler is not None:
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(refresh_data, 'interval', hours=24)
+else:
+    scheduler = None
 
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
-    global summary_df, etf_value, last_build
-
-    if datetime.now() - last_build >= timedelta(hours=24):
+    # build on first request when startup didn't (e.g. flask run / WSGI
+    # import); without apscheduler, staleness is also handled here
+    if last_build is None or (
+            scheduler is None and datetime.now() - last_build >= timedelta(hours=24)):
         refresh_data()
 
+    with _data_lock:
+        value = etf_value
+        html = summary_html
+        text = summary_text
+        tag = summary_etag
+
     if request.method == 'POST':
         data = request.get_json() or {}
         question = data.get('question', '')
-        answer = ask_about_etf_table(question, summary_html)
+        answer = ask_about_etf_table(question, text)
         return jsonify({'answer': answer})
 
-    return render_template(
+    # repeat visitors with an up-to-date copy skip the body entirely
+    if tag is not None and request.headers.get('If-None-Match') == tag:
+        return '', 304
+
+    resp = make_response(render_template(
         'index.html',
-        etf_value=etf_value,
-        summary_html=summary_html
-    )
+        etf_value=value,
+        summary_html=html
+    ))
+    if tag is not None:
+        resp.headers['ETag'] = tag
+    return resp
+
+
+@app.route('/admin/refresh', methods=['POST'])
+def admin_refresh():
+    """Manual cache invalidation: rebuild now instead of waiting 24h."""
+    refresh_data()
+    return jsonify({'refreshed': last_build.isoformat()})
+
 
 if __name__ == '__main__':
-    # Run the Flask development server
-    app.run(debug=True)
\ No newline at end of file
+    # Build once at startup rather than at import, then run the Flask
+    # development server with the 24h background refresh
+    refresh_data()
+    if scheduler is not None:
+        scheduler.start()
+    app.run(debug=True)
@@ -1,81 +1,235 @@
 import os
+import re
+import time
 import requests
+import numpy as np
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
 from dotenv import load_dotenv
 from countryinfo import CountryInfo
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
 
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None  # optional; the C engine and no Parquet cache without it
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None  # optional fast path; pandas pipeline is used without it
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None  # optional; the plain NumPy kernel is used without it
+
+
+# shared session (keep-alive) and 1-hour caches so repeated rebuilds
+# don't re-hit the FX API on every call
+_SESSION = requests.Session()
+_FX_TTL = 3600
+_FX_CACHE = {'ts': 0, 'data': None, 'codes': None}
+_FX_HIST_CACHE = {'ts': 0, 'date': None, 'data': None}
+
+# year columns are exactly four digits; rejects other digit-only codes
+_YEAR_RE = re.compile(r'\d{4}')
 
 
 def fetch_fx_rates(api_key_env: str = 'FREECURRENCY_API_KEY') -> dict:
     """
     Fetches live foreign exchange rates from the external API. Returns a dict mapping ISO currency codes to units of foreign currency per 1 USD.
+    Results are cached for an hour so hot paths (web refresh, history logger) don't repeat the request.
+    """
+    if _FX_CACHE['data'] is not None and time.time() - _FX_CACHE['ts'] < _FX_TTL:
+        return _FX_CACHE['data']
+    load_dotenv()
+    key = os.getenv(api_key_env)
+    if not key:
+        raise RuntimeError(f"{api_key_env} not found in environment")
+    resp = _SESSION.get(f"https://api.freecurrencyapi.com/v1/latest?apikey={key}", timeout=5)
+    resp.raise_for_status()
+    _FX_CACHE['data'] = resp.json()['data']
+    _FX_CACHE['codes'] = frozenset(_FX_CACHE['data'])
+    _FX_CACHE['ts'] = time.time()
+    return _FX_CACHE['data']
+
+
+def fetch_fx_history(date_iso: str, api_key_env: str = 'FREECURRENCY_API_KEY') -> dict:
     """
+    Fetches historical FX rates for the given ISO date, with the same 1-hour cache and shared session as fetch_fx_rates.
+    """
+    if (_FX_HIST_CACHE['data'] is not None and _FX_HIST_CACHE['date'] == date_iso
+            and time.time() - _FX_HIST_CACHE['ts'] < _FX_TTL):
+        return _FX_HIST_CACHE['data']
     load_dotenv()
     key = os.getenv(api_key_env)
     if not key:
         raise RuntimeError(f"{api_key_env} not found in environment")
-    resp = requests.get(f"https://api.freecurrencyapi.com/v1/latest?apikey={key}")
+    resp = _SESSION.get(
+        f"https://api.freecurrencyapi.com/v1/historical"
+        f"?apikey={key}&date={date_iso}",
+        timeout=5
+    )
     resp.raise_for_status()
-    return resp.json()['data']
+    _FX_HIST_CACHE['data'] = resp.json()['data'][date_iso]
+    _FX_HIST_CACHE['date'] = date_iso
+    _FX_HIST_CACHE['ts'] = time.time()
+    return _FX_HIST_CACHE['data']
 
 def load_imf_data(csv_path: str) -> pd.DataFrame:
     """
     Loads the IMF dataset CSV into a pandas DataFrame.
+    Only the columns the pipeline uses (COUNTRY, INDICATOR and the year columns) are read, with float32 year values, via the multithreaded pyarrow parser when pyarrow is installed (the C engine otherwise).
+    With pyarrow the parsed frame is also cached next to the CSV as Parquet; reruns load that instead as long as the CSV hasn't changed.
     """
-    return pd.read_csv(csv_path)
+    cache = csv_path + '.parquet'
+    if (pyarrow is not None and os.path.isfile(cache)
+            and os.path.getmtime(cache) >= os.path.getmtime(csv_path)):
+        df = pd.read_parquet(cache, engine='pyarrow')
+    else:
+        # sniff the header first so we can push the column whitelist into the reader
+        header = pd.read_csv(csv_path, nrows=0).columns
+        years = [c for c in header if _YEAR_RE.fullmatch(c)]
+        usecols = ['COUNTRY', 'INDICATOR'] + years
+        df = pd.read_csv(
+            csv_path,
+            engine='pyarrow' if pyarrow is not None else 'c',
+            usecols=usecols,
+            dtype={y: 'float32' for y in years},
+        )
+        if pyarrow is not None:
+            try:
+                df.to_parquet(cache, compression='zstd')
+            except OSError:
+                pass  # read-only data dir; just skip the cache
+
+    # cache the year columns (and their int values) on the frame so
+    # downstream code never re-derives or re-parses them
+    year_cols = [c for c in df.columns if _YEAR_RE.fullmatch(c)]
+    df.attrs['year_cols'] = year_cols
+    df.attrs['year_ints'] = np.array([int(y) for y in year_cols])
+    return df
 
 def extract_latest_values(df: pd.DataFrame, indicators: list) -> pd.DataFrame:
     """
     Filters to only the specified indicators, then for each country–indicator picks the value for the current calendar year (if available), otherwise the most recent prior year. Future-year estimates (> CURRENT_YEAR) are ignored.
     """
-    years = [col for col in df.columns if col.isdigit()]
+    # prefer the year columns cached by load_imf_data; re-derive only when
+    # handed a frame from elsewhere
+    years = df.attrs.get('year_cols')
+    if years is None:
+        years = [col for col in df.columns if _YEAR_RE.fullmatch(col)]
     subset = df[df['INDICATOR'].isin(indicators)].copy()
     CURRENT_YEAR = datetime.now().year
 
-    def latest(row):
-        # build {year_int: value} but only up to CURRENT_YEAR
-        avail = {
-            int(y): row[y]
-            for y in years
-            if pd.notna(row[y]) and int(y) <= CURRENT_YEAR
-        }
-        if not avail:
-            return pd.NA
-        if CURRENT_YEAR in avail:
-            return avail[CURRENT_YEAR]
-        return avail[max(avail)]
-
-    subset['Latest'] = subset.apply(latest, axis=1)
+    # vectorized: slice the year columns into one float matrix, keep only
+    # years up to CURRENT_YEAR, then pick the latest non-NaN year per row
+    year_ints = df.attrs.get('year_ints')
+    if year_ints is None:
+        year_ints = np.array([int(y) for y in years])
+    valid = year_ints <= CURRENT_YEAR
+    M = subset[years].to_numpy(dtype=float)[:, valid]
+    year_ints = year_ints[valid]
+
+    # mark NaN cells with -1 so argmax lands on the latest populated year
+    marked = np.where(~np.isnan(M), year_ints, -1)
+    idx = marked.argmax(axis=1)
+    latest = M[np.arange(len(M)), idx]
+    latest[marked.max(axis=1) == -1] = np.nan  # rows with no usable year
+
+    subset['Latest'] = latest
     return subset.pivot(index='COUNTRY', columns='INDICATOR', values='Latest')
 
 
-def map_currencies(wide_df: pd.DataFrame) -> pd.DataFrame:
+def load_latest_values_lazy(csv_path: str, indicators: list) -> pd.DataFrame:
     """
-    Automaps each country name to its ISO4217 currency code using CountryInfo, then fetches live FX rates and drops any rows for which we don’t have a rate.
+    Polars lazy-scan equivalent of load_imf_data + extract_latest_values: the indicator filter and column projection are pushed into the CSV reader, so unused rows and columns are never materialized. Returns the same COUNTRY x INDICATOR wide pandas DataFrame.
     """
-    def get_code(name):
-        for variant in (name, name.split('(')[0].strip(), name.split(',')[0].strip()):
-            try:
-                codes = CountryInfo(variant).currencies()
-                if codes:
-                    return codes[0]
-            except Exception:
+    CURRENT_YEAR = datetime.now().year
+    header = pd.read_csv(csv_path, nrows=0).columns
+    year_cols = [c for c in header if _YEAR_RE.fullmatch(c)]
+    # force float schemas for the year columns: the CSV quotes every field,
+    # and inferring them as String would keep '' cells alive as bogus
+    # "latest" values instead of dropping them as nulls
+    latest = (
+        pl.scan_csv(csv_path, schema_overrides={y: pl.Float64 for y in year_cols})
+        .filter(pl.col('INDICATOR').is_in(indicators))
+        .select(['COUNTRY', 'INDICATOR', *year_cols])
+        .unpivot(index=['COUNTRY', 'INDICATOR'], variable_name='year', value_name='value')
+        .filter(
+            (pl.col('year').cast(pl.Int32) <= CURRENT_YEAR)
+            & pl.col('value').is_not_null()
+        )
+        .group_by(['COUNTRY', 'INDICATOR'])
+        .agg(pl.col('value').sort_by(pl.col('year').cast(pl.Int32)).last())
+        .collect()
+    )
+    wide = latest.pivot(on='INDICATOR', index='COUNTRY', values='value')
+    return wide.to_pandas().set_index('COUNTRY')
+
+
+_NAME_TO_ISO = None
+
+def _name_to_iso() -> dict:
+    """
+    Builds the country-name → ISO4217 currency map once from the bundled CountryInfo dataset (official names, native names, alt spellings, plus the pre-'('/pre-',' variants), lowercased for case-insensitive lookup. Exact names always beat truncated variants, and a truncated variant claimed by two countries with different currencies is dropped as ambiguous. Cached after the first call.
+    """
+    global _NAME_TO_ISO
+    if _NAME_TO_ISO is None:
+        try:
+            countries = CountryInfo.all()    # classmethod on countryinfo >= 1.0
+        except TypeError:
+            countries = CountryInfo().all()  # instance method on older releases
+        exact = {}
+        truncated = {}
+        for key, info in countries.items():
+            codes = info.get('currencies') or []
+            if not codes:
                 continue
-        return None
+            code = codes[0]
+            names = {key, info.get('name', key)}
+            if info.get('nativeName'):
+                names.add(info['nativeName'])
+            names.update(info.get('altSpellings', []))
+            for n in names:
+                exact.setdefault(n.lower(), code)
+            for n in names:
+                for cut in (n.split('(')[0].strip().lower(), n.split(',')[0].strip().lower()):
+                    if not cut or cut in exact:
+                        continue
+                    if cut in truncated and truncated[cut] != code:
+                        truncated[cut] = None  # two countries claim it: ambiguous
+                    else:
+                        truncated[cut] = code
+        mapping = {k: v for k, v in truncated.items() if v is not None}
+        mapping.update(exact)  # exact names always win over truncations
+        _NAME_TO_ISO = mapping
+    return _NAME_TO_ISO
+
 
-    #map country → ISO code, drop misses
-    wide_df['Currency'] = wide_df.index.map(get_code)
+def map_currencies(wide_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Automaps each country name to its ISO4217 currency code via a precomputed lookup table, then fetches live FX rates and drops any rows for which we don’t have a rate.
+    """
+    iso = _name_to_iso()
+
+    #map country → ISO code (exact name, then pre-( and pre-, variants), drop misses
+    names = wide_df.index.to_series().str.lower()
+    currency = names.map(iso)
+    currency = currency.fillna(names.str.split('(').str[0].str.strip().map(iso))
+    currency = currency.fillna(names.str.split(',').str[0].str.strip().map(iso))
+    wide_df['Currency'] = currency.to_numpy()
     wide_df = wide_df.dropna(subset=['Currency'])
 
     # fetch FX once
     fx = fetch_fx_rates()
+    codes = _FX_CACHE['codes'] or frozenset(fx)
 
-    # keep only currencies present in FX API
-    wide_df = wide_df[wide_df['Currency'].isin(fx.keys())].copy()
-
-    # map in the FX rate
+    # intersect the frozenset of API codes with the currencies we actually
+    # have, then filter against that small set before mapping in the rates
+    valid = codes & set(wide_df['Currency'].unique())
+    wide_df = wide_df[wide_df['Currency'].isin(valid)].copy()
     wide_df['FX Rate'] = wide_df['Currency'].map(fx)
 
     return wide_df
@@ -91,18 +245,22 @@ def apply_health_filters(df: pd.DataFrame) -> pd.DataFrame:
 
     If no country passes, skips filtering and returns the original DataFrame.
     """
-    # extract series by their exact column names
-    unemp    = df['Unemployment rate']
-    debt     = df['Gross debt, General government, Percent of GDP']
-    infl     = df['All Items, Consumer price index (CPI), Period average, percent change']
-    cav      = df['Current account balance (credit less debit), Percent of GDP']
-    gdp      = df['Gross domestic product (GDP), Current prices, US dollar']
+    # pull the filter columns into one contiguous float32 block so the
+    # whole mask is computed in a single NumPy pass
+    cols = [
+        'Unemployment rate',
+        'Gross debt, General government, Percent of GDP',
+        'All Items, Consumer price index (CPI), Period average, percent change',
+        'Current account balance (credit less debit), Percent of GDP',
+    ]
+    M = df[cols].to_numpy(dtype=np.float32)
+    unemp, debt, infl, cav = M[:, 0], M[:, 1], M[:, 2], M[:, 3]
 
     mask = (
-        (unemp    <= 15)               &
-        (debt     <= 110)              &
-        (infl.between(-2, 50))         &
-        (cav      >= -5)               
+        (unemp <= 15)  &
+        (debt  <= 110) &
+        (infl  >= -2)  & (infl <= 50) &
+        (cav   >= -5)
     )
 
     if mask.sum() == 0:
@@ -113,26 +271,47 @@ def apply_health_filters(df: pd.DataFrame) -> pd.DataFrame:
     return df[mask]
 
 
+def _score_kernel(X):
+    """
+    Scoring kernel: z-score the float32 matrix in place and return the per-row composite scores plus the positive mask. Numba-compiled (cached across runs) when numba is installed.
+    """
+    n = X.shape[0]
+    mu = np.sum(X, 0) / n
+    var = np.sum((X - mu) ** 2, 0) / n
+    sd = np.sqrt(var)
+    for j in range(sd.shape[0]):
+        if sd[j] == 0:
+            sd[j] = 1  # constant column: scale 1, like StandardScaler did
+    X -= mu
+    X /= sd
+    scores = np.sum(X, 1) / X.shape[1]
+    return scores, scores > 0
+
+if njit is not None:
+    _score_kernel = njit(cache=True, fastmath=True)(_score_kernel)
+
+
 def compute_scores_and_weights(df: pd.DataFrame, final_inds: list) -> pd.DataFrame:
     """
     Imputes missing values, z-scores the final indicators (macros + FX), computes a composite score (mean of z-scores), filters to positive scores, and normalizes to weights summing to 1. Returns a DataFrame with CompositeScore and Weight.
     """
     df_flat = df.copy()
-    df_flat[final_inds] = df_flat[final_inds].apply(lambda col: col.fillna(col.median()))
-    
-    scaler = StandardScaler()
-    Z = scaler.fit_transform(df_flat[final_inds])
-    Zdf = pd.DataFrame(Z, index=df_flat.index, columns=final_inds)
-    
-    Zdf['CompositeScore'] = Zdf.mean(axis=1)
-    Zdf_pos = Zdf[Zdf['CompositeScore'] > 0].copy()
-    if Zdf_pos.empty:
+    medians = df_flat[final_inds].median()
+    df_flat[final_inds] = df_flat[final_inds].fillna(medians)
+
+    # z-score + composite score on the float32 copy, in the (optionally
+    # Numba-compiled) kernel; only the final result gets wrapped in a
+    # DataFrame
+    X = df_flat[final_inds].to_numpy(np.float32)
+    scores, pos = _score_kernel(X)
+    if not pos.any():
         print("No positive composite scores; using all.")
-        Zdf_pos = Zdf.copy()
-    
-    total = Zdf_pos['CompositeScore'].sum()
-    Zdf_pos['Weight'] = Zdf_pos['CompositeScore'] / total
-    return Zdf_pos[['CompositeScore','Weight']]
+        pos = np.ones_like(pos)
+    weights = scores[pos] / scores[pos].sum()
+    return pd.DataFrame(
+        {'CompositeScore': scores[pos], 'Weight': weights},
+        index=df_flat.index[pos]
+    )
 
 def build_etf_table(imf_csv_path: str) -> pd.DataFrame:
     """
@@ -149,16 +328,22 @@ def build_etf_table(imf_csv_path: str) -> pd.DataFrame:
         'External debt, Percent of GDP',
         'Exports of goods and services, US dollar'
     ]
-    df = load_imf_data(imf_csv_path)
-    wide = extract_latest_values(df, indicators)
-    wide = map_currencies(wide)
-    # 3) compute a 1-year FX return proxy using the same freecurrencyapi:
+    if pl is not None:
+        wide = load_latest_values_lazy(imf_csv_path, indicators)
+    else:
+        df = load_imf_data(imf_csv_path)
+        wide = extract_latest_values(df, indicators)
+    # 2) fire both FX requests (latest + 1-year historical) concurrently;
+    # total latency is the slower of the two instead of their sum, and
+    # map_currencies below is served from the warmed cache
     one_year_ago = (date.today() - timedelta(days=365)).isoformat()
-    hist = requests.get(
-        f"https://api.freecurrencyapi.com/v1/historical"
-        f"?apikey={os.getenv('FREECURRENCY_API_KEY')}"
-        f"&date={one_year_ago}"
-    ).json()['data'][one_year_ago]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        fx_future = pool.submit(fetch_fx_rates)
+        hist_future = pool.submit(fetch_fx_history, one_year_ago)
+        fx_future.result()
+        hist = hist_future.result()
+
+    wide = map_currencies(wide)
 
     # map that into a new column and get simple return
     wide['FX Rate 1Y'] = wide['Currency'].map(hist)
@@ -177,8 +362,9 @@ def compute_etf_value(etf_df: pd.DataFrame, wide: pd.DataFrame) -> float:
     """
     Given the ETF table (with weights) and the wide DataFrame (with FX Rate), computes the USD-denominated ETF value as the weighted sum of USD-per-unit.
     """
-    usd_per_unit = 1 / wide.loc[etf_df.index, 'FX Rate']
-    return (etf_df['Weight'] * usd_per_unit).sum()
+    fx = wide['FX Rate'].reindex(etf_df.index).to_numpy(dtype=float)
+    weights = etf_df['Weight'].to_numpy()
+    return float(weights @ np.reciprocal(fx))
 
 def show_top10_table(etf_df: pd.DataFrame, wide_df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -193,22 +379,25 @@ def show_top10_table(etf_df: pd.DataFrame, wide_df: pd.DataFrame) -> pd.DataFram
     """
     top10 = etf_df.sort_values('Weight', ascending=False).head(10)
 
+    # one reindex instead of a label-aligned .loc per column
+    w = wide_df.reindex(top10.index)
+
     summary = pd.DataFrame({
         'Country':          top10.index,
-        'Currency':         wide_df.loc[top10.index, 'Currency'],
-        'Weight (%)':       top10['Weight'] * 100,
-        'Value ($)':        1 / wide_df.loc[top10.index, 'FX Rate'],
-        'GDP ($ Trillion)':              wide_df.loc[top10.index, 'Gross domestic product (GDP), Current prices, US dollar'],
-        'Unemployment (%)': wide_df.loc[top10.index, 'Unemployment rate'],
-        'Inflation (%)':    wide_df.loc[top10.index, 'All Items, Consumer price index (CPI), Period average, percent change']
+        'Currency':         w['Currency'].to_numpy(),
+        'Weight (%)':       top10['Weight'].to_numpy() * 100,
+        'Value ($)':        np.reciprocal(w['FX Rate'].to_numpy(dtype=float)),
+        'GDP ($ Trillion)': w['Gross domestic product (GDP), Current prices, US dollar'].to_numpy(),
+        'Unemployment (%)': w['Unemployment rate'].to_numpy(),
+        'Inflation (%)':    w['All Items, Consumer price index (CPI), Period average, percent change'].to_numpy()
     })
 
+    # round the numeric block in one vectorized call; display formatting
+    # handles the trailing zeros instead of a per-cell lambda
+    num_cols = ['Weight (%)', 'Value ($)', 'GDP ($ Trillion)', 'Unemployment (%)', 'Inflation (%)']
+    summary[num_cols] = summary[num_cols].round(2)
     pd.options.display.float_format = "{:.2f}".format
 
-    for col in ['Weight (%)','Value ($)','GDP ($ Trillion)','Unemployment (%)','Inflation (%)']:
-        summary[col] = summary[col].map(lambda x: f"{x:.2f}")
-
-
     return summary.reset_index(drop=True)
 
 
@@ -6,15 +6,14 @@ from etf_base import build_etf_table, compute_etf_value
 def log_etf_value(value, path='data/etf_history.csv'):
     os.makedirs(os.path.dirname(path), exist_ok=True)
 
-    if not os.path.isfile(path):
-        with open(path, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['timestamp', 'etf_value'])
-
-    timestamp = datetime.now().isoformat()
-    with open(path, 'a', newline='') as f:
+    # open once in append mode; write the header inside the same handle
+    # on first use instead of a separate open/close just for it
+    exists = os.path.isfile(path)
+    with open(path, 'a', newline='', buffering=8192) as f:
         writer = csv.writer(f)
-        writer.writerow([timestamp, value])
+        if not exists:
+            writer.writerow(['timestamp', 'etf_value'])
+        writer.writerow([datetime.now().isoformat(), value])
 
 if __name__ == "__main__":
     etf_df, wide_df  = build_etf_table('data/imf_dataset.csv')
@@ -4,9 +4,17 @@ from openai import OpenAI
 from etf_base import build_etf_table, show_top10_table
 
 load_dotenv()
-APIKEY = os.getenv("OPENAI_API_KEY")
 
-client = OpenAI(api_key=APIKEY)
+_client = None
+
+def _get_client() -> OpenAI:
+    """
+    Creates the OpenAI client on first use, so importing this module doesn't require an API key in the environment.
+    """
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
 
 SYSTEM_PROMPT = (
     "You are a helpful assistant that answers questions about an ETF currency allocation table. "
@@ -17,22 +25,22 @@ SYSTEM_PROMPT = (
 
 def get_etf_context(csv_path: str = 'data/imf_dataset.csv') -> str:
     """
-    Builds the ETF allocation table, produces the top-10 summary, and returns it as a markdown string for context.
+    Builds the ETF allocation table, produces the top-10 summary, and returns it as a plain-text table for context.
     """
     etf_table, wide_df = build_etf_table(csv_path)
     summary_df = show_top10_table(etf_table, wide_df)
-    return summary_df.to_markdown(index=False)
+    return summary_df.to_string(index=False)
 
-def ask_about_etf_table(question: str, context_markdown: str, model: str = "gpt-4o") -> str:
+def ask_about_etf_table(question: str, context_table: str, model: str = "gpt-4o") -> str:
     """
-    Sends the ETF table (in markdown) + user question to OpenAI, returning the model's answer.
+    Sends the ETF table (as plain text) + user question to OpenAI, returning the model's answer.
     """
     messages = [
         {"role": "system",    "content": SYSTEM_PROMPT},
-        {"role": "user",      "content": f"Here is the ETF summary table in markdown:\n\n{context_markdown}"},
+        {"role": "user",      "content": f"Here is the ETF summary table:\n\n{context_table}"},
         {"role": "user",      "content": question},
     ]
-    resp = client.chat.completions.create(
+    resp = _get_client().chat.completions.create(
         model=model,
         messages=messages,
     )
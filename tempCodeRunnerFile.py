@@ -9,10 +9,17 @@ load_dotenv()
 app = Flask(__name__)
 
 IMF_CSV = 'data/imf_dataset.csv'
-etf_table, wide_df = build_etf_table(IMF_CSV)
-summary_df = show_top10_table(etf_table, wide_df)
-etf_value = compute_etf_value(etf_table, wide_df)
-summary_html = summary_df.to_html(classes='table table-striped', index=False)
+etf_table = wide_df = summary_df = None
+etf_value = None
+summary_html = None
+
+def build_data():
+    """Build the ETF data once at startup instead of at import time."""
+    global etf_table, wide_df, summary_df, etf_value, summary_html
+    etf_table, wide_df = build_etf_table(IMF_CSV)
+    summary_df = show_top10_table(etf_table, wide_df)
+    etf_value = compute_etf_value(etf_table, wide_df)
+    summary_html = summary_df.to_html(classes='table table-striped', index=False)
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
@@ -30,4 +37,5 @@ def index():
 
 if __name__ == '__main__':
     # Run the Flask development server
+    build_data()
     app.run(debug=True)
\ No newline at end of file